@@ -1,28 +1,59 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, make_response
 from datetime import datetime, timedelta
+import hashlib
 from utils import (
-    load_json, save_json, is_admin, 
-    FOODS_FILE, WORKOUTS_FILE, ENTRIES_FILE, USERS_FILE
+    load_json, save_json, load_index, load_pending, is_admin,
+    file_stamp, IO_POOL, FOODS_FILE, WORKOUTS_FILE, ENTRIES_FILE, USERS_FILE
 )
 
 admin_bp = Blueprint('admin', __name__)
 
+def _dashboard_etag():
+    """ETag covering every file the dashboard renders from.
+
+    Returns None when any of the files has a save queued - the on-disk
+    mtimes are stale then, so the dashboard is rendered fresh with no ETag.
+    """
+    stamps = []
+    for path in (FOODS_FILE, WORKOUTS_FILE, ENTRIES_FILE, USERS_FILE):
+        stamp = file_stamp(path)
+        if stamp is None:
+            return None
+        stamps.append(str(stamp))
+    return '"' + hashlib.md5('-'.join(stamps).encode()).hexdigest() + '"'
+
 @admin_bp.route('/admin_dashboard')
 def admin_dashboard():
     if not is_admin():
         abort(403)
-    
+
+    # Repeat polls of an unchanged dashboard skip all loading and rendering
+    etag = _dashboard_etag()
+    if etag and request.headers.get('If-None-Match') == etag:
+        return '', 304
+
+    # Load the four files concurrently; on a cold cache the latency is
+    # roughly the slowest single load instead of the sum of all four
+    futures = {path: IO_POOL.submit(load_json, path)
+               for path in (FOODS_FILE, WORKOUTS_FILE, ENTRIES_FILE, USERS_FILE)}
+    all_foods = futures[FOODS_FILE].result()
+    all_workouts = futures[WORKOUTS_FILE].result()
+    all_entries = futures[ENTRIES_FILE].result()
+    users = futures[USERS_FILE].result()
+
     # Get pending items - ONLY items with pending_approval: true
-    foods = [f for f in load_json(FOODS_FILE) if f.get("pending_approval", False) == True]
-    workouts = [w for w in load_json(WORKOUTS_FILE) if w.get("pending_approval", False) == True]
-    entries = [e for e in load_json(ENTRIES_FILE) if e.get("pending_approval", False) == True]
-    users = load_json(USERS_FILE)
-    
-    return render_template('admin_dashboard.html',
-                         foods=foods,
-                         workouts=workouts,
-                         entries=entries,
-                         users=users)
+    foods = [all_foods[i] for i in load_pending(FOODS_FILE)]
+    workouts = [all_workouts[i] for i in load_pending(WORKOUTS_FILE)]
+    entries = [all_entries[i] for i in load_pending(ENTRIES_FILE)]
+    
+    response = make_response(render_template('admin_dashboard.html',
+                                             foods=foods,
+                                             workouts=workouts,
+                                             entries=entries,
+                                             users=users))
+    if etag:
+        response.headers['ETag'] = etag
+    return response
 
 # Food approval routes
 @admin_bp.route('/admin/approve_food/<name>', methods=['POST'])
@@ -31,11 +62,10 @@ def approve_food(name):
         abort(403)
     
     foods = load_json(FOODS_FILE)
-    for food in foods:
-        if food['name'] == name:
-            food['pending_approval'] = False
-            break
-    
+    idx = load_index(FOODS_FILE, 'name').get(name.lower())
+    if idx is not None:
+        foods[idx]['pending_approval'] = False
+
     save_json(FOODS_FILE, foods)
     flash(f"{name} approved!", "success")
     return redirect(url_for('admin.admin_dashboard'))
@@ -58,11 +88,10 @@ def approve_workout(name):
         abort(403)
     
     workouts = load_json(WORKOUTS_FILE)
-    for workout in workouts:
-        if workout['name'].lower() == name.lower():
-            workout['pending_approval'] = False
-            break
-    
+    idx = load_index(WORKOUTS_FILE, 'name').get(name.lower())
+    if idx is not None:
+        workouts[idx]['pending_approval'] = False
+
     save_json(WORKOUTS_FILE, workouts)
     flash(f"{name} approved!", "success")
     return redirect(url_for('admin.admin_dashboard'))
@@ -116,11 +145,11 @@ def ban_user(username):
         abort(403)
     
     users = load_json(USERS_FILE)
-    for user in users:
-        if user['username'] == username:
-            user['suspended_until'] = '9999-12-31'
-            break
-    
+    idx = load_index(USERS_FILE, 'username', lower=False).get(username)
+    if idx is not None:
+        users[idx]['suspended_until'] = '9999-12-31'
+        users[idx]['suspended_until_ts'] = datetime(9999, 12, 31).timestamp()
+
     save_json(USERS_FILE, users)
     flash(f"User {username} has been permanently banned!", "success")
     return redirect(url_for('admin.admin_dashboard'))
@@ -131,11 +160,12 @@ def timeout_user(username):
         abort(403)
     
     users = load_json(USERS_FILE)
-    for user in users:
-        if user['username'] == username:
-            user['suspended_until'] = (datetime.now() + timedelta(days=7)).isoformat()
-            break
-    
+    idx = load_index(USERS_FILE, 'username', lower=False).get(username)
+    if idx is not None:
+        until = datetime.now() + timedelta(days=7)
+        users[idx]['suspended_until'] = until.isoformat()
+        users[idx]['suspended_until_ts'] = until.timestamp()
+
     save_json(USERS_FILE, users)
     flash(f"User {username} has been suspended for 7 days!", "success")
     return redirect(url_for('admin.admin_dashboard'))
@@ -146,11 +176,11 @@ def unban_user(username):
         abort(403)
     
     users = load_json(USERS_FILE)
-    for user in users:
-        if user['username'] == username:
-            user['suspended_until'] = None
-            break
-    
+    idx = load_index(USERS_FILE, 'username', lower=False).get(username)
+    if idx is not None:
+        users[idx]['suspended_until'] = None
+        users[idx]['suspended_until_ts'] = 0
+
     save_json(USERS_FILE, users)
     flash(f"User {username} has been unbanned!", "success")
     return redirect(url_for('admin.admin_dashboard'))
\ No newline at end of file
@@ -1,14 +1,69 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from werkzeug.security import check_password_hash
+from argon2.exceptions import VerifyMismatchError, VerificationError, InvalidHashError
 from datetime import datetime
 from utils import (
-    load_json, save_json, get_user, update_user, calculate_recommended_macros, 
-    validate_name, check_rate_limit, USERS_FILE
+    load_json, save_json, get_user, update_user, username_taken,
+    calculate_recommended_macros, validate_name, check_rate_limit,
+    ojsonify, file_stamp, USERS_FILE, _ph
 )
 import re
+import time
+import hashlib
 
 auth_bp = Blueprint('auth', __name__)
 
+# Verified against when the username doesn't exist, so login takes the
+# same KDF time either way and response timing can't enumerate accounts
+_DUMMY_HASH = _ph.hash('x' * 16)
+
+# Bound method of a precompiled pattern; skips the re-module cache
+# lookup on every signup POST
+_has_digit = re.compile(r'\d').search
+
+# Onboarding form constants, hoisted so GET requests don't rebuild them
+ONBOARDING_DEFAULTS = {
+    'weight': 70, 'height': 175, 'age': 25,
+    'gender': 'male', 'goal': 'maintain', 'activity_level': 1.5
+}
+
+ACTIVITY_OPTIONS = [
+    (1.2, "Sedentary (little/no exercise)"),
+    (1.375, "Light activity (light exercise 1-3 days/week)"),
+    (1.5, "Moderate activity (moderate exercise 3-5 days/week)"),
+    (1.725, "Very active (hard exercise 6-7 days/week)"),
+    (1.9, "Extremely active (very hard exercise, physical job)")
+]
+
+# The defaults never change, so the recommendation shown on the
+# onboarding GET page is computed once here rather than per render
+RECOMMENDED_DEFAULTS = calculate_recommended_macros(**ONBOARDING_DEFAULTS)
+
+def verify_password(user, password):
+    """Check a login password, transparently upgrading legacy hashes.
+
+    New accounts store argon2 hashes. Accounts created before the switch
+    still carry werkzeug PBKDF2 hashes; those are verified the old way
+    and rehashed to argon2 on the first successful login.
+    """
+    stored = user.get('password', '')
+    if stored.startswith('$argon2'):
+        try:
+            _ph.verify(stored, password)
+        except (VerifyMismatchError, VerificationError, InvalidHashError):
+            return False
+        if _ph.check_needs_rehash(stored):
+            user['password'] = _ph.hash(password)
+            update_user(user)
+        return True
+
+    # Legacy werkzeug hash (pbkdf2:/scrypt: prefix)
+    if check_password_hash(stored, password):
+        user['password'] = _ph.hash(password)
+        update_user(user)
+        return True
+    return False
+
 @auth_bp.route('/check_username')
 def check_username():
     """API endpoint to check if username is available"""
@@ -16,13 +71,24 @@ def check_username():
     
     # Basic validation
     if not username or len(username) < 3:
-        return jsonify({'available': False, 'error': 'Username too short'})
-    
+        return ojsonify({'available': False, 'error': 'Username too short'})
+
+    # The answer only changes when the users file does, so as-you-type
+    # polls for the same name can be answered with 304 and no JSON work.
+    # A None stamp means a save is queued and the on-disk mtime is stale:
+    # answer fresh with no ETag
+    stamp = file_stamp(USERS_FILE)
+    etag = None
+    if stamp is not None:
+        etag = f'"{stamp:x}-{hashlib.blake2s(username.encode(), digest_size=8).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            return '', 304
+
     # Check if username exists (case-insensitive)
-    users = load_json(USERS_FILE)
-    username_taken = any(u['username'].lower() == username.lower() for u in users)
-    
-    return jsonify({'available': not username_taken})
+    response = ojsonify({'available': not username_taken(username)})
+    if etag:
+        response.headers['ETag'] = etag
+    return response
 
 @auth_bp.route('/signup', methods=['GET', 'POST'])
 def signup():
@@ -37,46 +103,39 @@ def signup():
         username = request.form['username'].strip()
         password = request.form['password']
         repeat_password = request.form['repeat_password']
-        
-        # Validate username
-        valid, error_msg = validate_name(username, "Username")
-        if not valid:
-            flash(error_msg, 'error')
-            return render_template('signup.html')
-        
-        # Additional username restrictions
-        if len(username) < 3:
-            flash('Username must be at least 3 characters long.', 'error')
-            return render_template('signup.html')
-        
-        if ',' in username:
-            flash('Commas are not allowed in username.', 'error')
-            return render_template('signup.html')
-        
-        # Password validation
+
+        # Cheapest checks first; the username index is only consulted,
+        # and the users file only loaded, once everything else passes
+        error = None
         if len(password) < 8:
-            flash('Password must be at least 8 characters long.', 'error')
-            return render_template('signup.html')
-        
-        if not re.search(r'\d', password):
-            flash('Password must contain at least one number.', 'error')
-            return render_template('signup.html')
-        
-        if password != repeat_password:
-            flash('Passwords do not match.', 'error')
+            error = 'Password must be at least 8 characters long.'
+        elif not _has_digit(password):
+            error = 'Password must contain at least one number.'
+        elif password != repeat_password:
+            error = 'Passwords do not match.'
+        elif len(username) < 3:
+            error = 'Username must be at least 3 characters long.'
+        elif ',' in username:
+            error = 'Commas are not allowed in username.'
+        else:
+            valid, error_msg = validate_name(username, "Username")
+            if not valid:
+                error = error_msg
+            elif username_taken(username):
+                error = 'Username already exists'
+
+        if error:
+            flash(error, 'error')
             return render_template('signup.html')
-        
+
         users = load_json(USERS_FILE)
-        if any(user['username'].lower() == username.lower() for user in users):
-            flash('Username already exists', 'error')
-            return render_template('signup.html')
-        
-        hashed_pw = generate_password_hash(password)
+        hashed_pw = _ph.hash(password)
         users.append({
             "username": username,
             "password": hashed_pw,
             "role": "user",
             "suspended_until": None,
+            "suspended_until_ts": 0,
             "profile": {}
         })
         
@@ -106,19 +165,39 @@ def login():
         if not username or not password:
             flash('Please enter both username and password.', 'error')
             return render_template('login.html')
-        
+
+        # Per-account throttle: repeated guesses at one username stop
+        # burning KDF time after a few attempts regardless of source IP
+        account_key = hashlib.blake2s(username.lower().encode(), digest_size=16).hexdigest()
+        rate_ok, rate_msg = check_rate_limit(account_key, 'login_id', max_actions=5, time_window=900)
+        if not rate_ok:
+            flash(rate_msg, 'error')
+            return render_template('login.html')
+
         user = get_user(username)
-        
-        if user and check_password_hash(user['password'], password):
-            # Check suspension
-            if user.get('suspended_until'):
+
+        if user is None:
+            # Burn the same hash-verify time as a real account would
+            try:
+                _ph.verify(_DUMMY_HASH, password)
+            except (VerifyMismatchError, VerificationError):
+                pass
+            flash('Invalid credentials', 'error')
+            return render_template('login.html')
+
+        if verify_password(user, password):
+            # Check suspension - one int compare for accounts carrying the
+            # cached timestamp; legacy records fall back to parsing the ISO string
+            suspended_ts = user.get('suspended_until_ts')
+            if suspended_ts is None and user.get('suspended_until'):
                 try:
-                    until = datetime.fromisoformat(user['suspended_until'])
-                    if until > datetime.now():
-                        flash(f'Account suspended until {until.strftime("%Y-%m-%d %H:%M")}', 'error')
-                        return render_template('login.html')
-                except:
-                    pass  # Invalid date format, proceed with login
+                    suspended_ts = datetime.fromisoformat(user['suspended_until']).timestamp()
+                except ValueError:
+                    suspended_ts = 0  # Invalid date format, proceed with login
+            if suspended_ts and suspended_ts > time.time():
+                until = datetime.fromtimestamp(suspended_ts)
+                flash(f'Account suspended until {until.strftime("%Y-%m-%d %H:%M")}', 'error')
+                return render_template('login.html')
             
             session['user'] = username
             
@@ -143,12 +222,8 @@ def onboarding():
     if 'user' not in session:
         return redirect(url_for('auth.login'))
     
-    # Default values
-    defaults = {
-        'weight': 70, 'height': 175, 'age': 25,
-        'gender': 'male', 'goal': 'maintain', 'activity_level': 1.5
-    }
-    
+    defaults = ONBOARDING_DEFAULTS
+
     if request.method == 'POST':
         try:
             # Get form data with validation
@@ -184,29 +259,26 @@ def onboarding():
                 gender=gender, goal=goal, activity_level=activity_level
             )
             
-            # Get macro goals (allow user override)
-            protein_goal = int(request.form.get('protein_goal', recommended['protein']))
-            carb_goal = int(request.form.get('carb_goal', recommended['carbs']))
-            fat_goal = int(request.form.get('fat_goal', recommended['fat']))
-            calorie_goal = int(request.form.get('calorie_goal', recommended['calories']))
-            
-            # Validate macro goals
-            if not (0 <= protein_goal <= 1000):
-                protein_goal = recommended['protein']
-            if not (0 <= carb_goal <= 2000):
-                carb_goal = recommended['carbs']
-            if not (0 <= fat_goal <= 500):
-                fat_goal = recommended['fat']
-            if not (500 <= calorie_goal <= 10000):
-                calorie_goal = recommended['calories']
+            # Get macro goals (allow user override), falling back to the
+            # recommendation when a value is missing or out of range
+            goal_specs = (
+                ('protein_goal', 0, 1000, recommended['protein']),
+                ('carb_goal', 0, 2000, recommended['carbs']),
+                ('fat_goal', 0, 500, recommended['fat']),
+                ('calorie_goal', 500, 10000, recommended['calories']),
+            )
+            goals = {}
+            for key, lo, hi, default in goal_specs:
+                value = int(request.form.get(key, default))
+                goals[key] = value if lo <= value <= hi else default
             
             # Update user profile
             user = get_user(session['user'])
             user['profile'] = {
                 "height": height, "weight": weight, "goal": goal,
-                "calorie_goal": calorie_goal, "age": age, "gender": gender,
-                "activity_level": activity_level, "protein_goal": protein_goal,
-                "carb_goal": carb_goal, "fat_goal": fat_goal,
+                "calorie_goal": goals['calorie_goal'], "age": age, "gender": gender,
+                "activity_level": activity_level, "protein_goal": goals['protein_goal'],
+                "carb_goal": goals['carb_goal'], "fat_goal": goals['fat_goal'],
                 "tdee": recommended['tdee'], "bmr": recommended['bmr']
             }
             update_user(user)
@@ -216,18 +288,7 @@ def onboarding():
         except (ValueError, TypeError):
             flash('Please enter valid values for all fields.', 'error')
     
-    # Calculate recommendations for display
-    recommended = calculate_recommended_macros(**defaults)
-    
-    activity_options = [
-        (1.2, "Sedentary (little/no exercise)"),
-        (1.375, "Light activity (light exercise 1-3 days/week)"),
-        (1.5, "Moderate activity (moderate exercise 3-5 days/week)"),
-        (1.725, "Very active (hard exercise 6-7 days/week)"),
-        (1.9, "Extremely active (very hard exercise, physical job)")
-    ]
-    
-    return render_template('onboarding.html', 
-                         recommended_macros=recommended,
-                         activity_options=activity_options,
+    return render_template('onboarding.html',
+                         recommended_macros=RECOMMENDED_DEFAULTS,
+                         activity_options=ACTIVITY_OPTIONS,
                          selected_activity=defaults['activity_level'])
\ No newline at end of file
@@ -1,10 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
-from datetime import date
-import json
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, Response
 from utils import (
-    load_json, save_json, get_user, is_admin, find_duplicate, 
-    safe_float, validate_name, validate_numeric_input, check_rate_limit,
-    sanitize_categories, FOODS_FILE, ENTRIES_FILE
+    load_json, save_json, get_user, is_admin, find_duplicate,
+    validate_name, validate_numeric_input, check_rate_limit,
+    sanitize_categories, append_entries, load_index, ojsonify, read_bytes,
+    file_stamp, load_visible_foods, FOODS_FILE
 )
 from utils import get_tbilisi_date
 
@@ -23,44 +22,54 @@ def log_food():
             return redirect(url_for('food.log_food'))
         
         try:
-            entries = load_json(ENTRIES_FILE)
             foods_db = load_json(FOODS_FILE)
-            
+
             selected_foods = request.form.getlist('foods')
             if not selected_foods:
                 flash('Please select at least one food item.', 'error')
                 return redirect(url_for('food.log_food'))
-            
+
             logged_foods = []
-            
-            # CREATE SEPARATE ENTRY FOR EACH FOOD
+            foods_array = []
+            by_name = load_index(FOODS_FILE, 'name', lower=False)
+
+            # One pass over the form instead of a MultiDict lookup per food
+            amounts = {k[7:]: v for k, v in request.form.items()
+                       if k.startswith('amount_')}
+
             for food_name in selected_foods:
-                food = next((f for f in foods_db if f['name'] == food_name), None)
+                idx = by_name.get(food_name)
+                food = foods_db[idx] if idx is not None else None
                 if food:
-                    amount_key = f'amount_{food_name}'
-                    amount = request.form.get(amount_key)
-                    
+                    amount = amounts.get(food_name)
+
                     if not amount or float(amount) <= 0:
                         flash(f'Please enter a valid amount for {food_name}.', 'error')
                         return redirect(url_for('food.log_food'))
-                    
-                    food_entry = food.copy()
-                    food_entry['amount'] = float(amount)
-                    
-                    # Create individual entry for this food
-                    entry = {
-                        "user": session['user'],
-                        "date": get_tbilisi_date().isoformat(),
-                        "foods": [food_entry],  # Single food in array
-                        "workouts": [],  # Empty workouts for food entry
-                        "privacy": "Private"
-                    }
-                    
-                    entries.append(entry)
+
+                    # Only the fields aggregation and rendering read;
+                    # creator/categories/flags can be joined back from the
+                    # foods DB by name when needed
+                    foods_array.append({
+                        "name": food['name'],
+                        "calories": food['calories'],
+                        "protein": food['protein'],
+                        "carbs": food['carbs'],
+                        "fat": food['fat'],
+                        "amount": float(amount)
+                    })
                     logged_foods.append(food_name)
-            
+
             if logged_foods:
-                save_json(ENTRIES_FILE, entries)
+                # One combined entry per POST - the entries log grows per
+                # log action, not per selected food
+                append_entries({
+                    "user": session['user'],
+                    "date": get_tbilisi_date().isoformat(),
+                    "foods": foods_array,
+                    "workouts": [],
+                    "privacy": "Private"
+                })
                 flash(f'✅ Successfully logged {len(logged_foods)} food(s): {", ".join(logged_foods)}!', 'success')
             
             return redirect(url_for('home'))
@@ -70,17 +79,8 @@ def log_food():
             return redirect(url_for('food.log_food'))
     
     # Show only approved public foods OR private foods created by current user
-    all_foods = load_json(FOODS_FILE)
-    foods = []
-    
-    for f in all_foods:
-        if f.get('public', True):
-            if not f.get('pending_approval', False):
-                foods.append(f)
-        else:
-            if f.get('creator') == session.get('user'):
-                foods.append(f)
-    
+    foods = load_visible_foods(session.get('user'))
+
     user = get_user(session.get('user'))
     
     return render_template('log_food.html', 
@@ -178,8 +178,9 @@ def delete_food(name):
     admin = is_admin()
     
     # Find the food to check permissions
-    food_to_delete = next((f for f in foods if f['name'].lower() == name.lower()), None)
-    
+    idx = load_index(FOODS_FILE, 'name').get(name.lower())
+    food_to_delete = foods[idx] if idx is not None else None
+
     if not food_to_delete:
         flash("Food not found", "error")
         return redirect(url_for('food.log_food'))
@@ -194,16 +195,11 @@ def delete_food(name):
     can_delete = is_creator or (admin and is_approved_public)
     
     if can_delete:
-        original_count = len(foods)
-        foods = [f for f in foods if f['name'].lower() != name.lower()]
-        
-        if len(foods) < original_count:
-            try:
-                save_json(FOODS_FILE, foods)
-                flash(f"{name} deleted", "success")
-            except Exception:
-                flash("Error deleting food", "error")
-        else:
+        try:
+            del foods[idx]
+            save_json(FOODS_FILE, foods)
+            flash(f"{name} deleted", "success")
+        except Exception:
             flash("Error deleting food", "error")
     else:
         flash("You don't have permission to delete this food", "error")
@@ -214,19 +210,38 @@ def delete_food(name):
 def api_foods():
     """API endpoint to get all foods as JSON"""
     try:
-        foods = load_json(FOODS_FILE)
-        return jsonify(foods)
+        # The file is already JSON - pass its bytes through instead of
+        # parsing and re-encoding, with an mtime ETag for repeat clients.
+        # A None stamp means a save is queued and the on-disk mtime is
+        # stale: serve fresh with no ETag
+        stamp = file_stamp(FOODS_FILE)
+        etag = '"' + str(stamp) + '"' if stamp is not None else None
+        if etag and request.headers.get('If-None-Match') == etag:
+            return '', 304
+        response = Response(read_bytes(FOODS_FILE), mimetype='application/json')
+        if etag:
+            response.headers['ETag'] = etag
+        return response
     except Exception as e:
-        return jsonify([]), 500
+        return ojsonify([], status=500)
 
 @food_bp.route('/api/foods/<food_name>', methods=['GET'])
 def api_food_details(food_name):
     """API endpoint to get specific food details"""
     try:
+        stamp = file_stamp(FOODS_FILE)
+        etag = '"' + str(stamp) + '"' if stamp is not None else None
+        if etag and request.headers.get('If-None-Match') == etag:
+            return '', 304
+
         foods = load_json(FOODS_FILE)
-        food = next((f for f in foods if f['name'] == food_name), None)
+        idx = load_index(FOODS_FILE, 'name', lower=False).get(food_name)
+        food = foods[idx] if idx is not None else None
         if food:
-            return jsonify(food)
-        return jsonify({'error': 'Food not found'}), 404
+            response = ojsonify(food)
+            if etag:
+                response.headers['ETag'] = etag
+            return response
+        return ojsonify({'error': 'Food not found'}, status=404)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return ojsonify({'error': str(e)}, status=500)
\ No newline at end of file
@@ -1,368 +1,359 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
-from utils import load_json, save_json, get_user, check_rate_limit, get_tbilisi_date
-import os
-from datetime import date
-
-templates_bp = Blueprint('templates', __name__)
-
-# Data file paths
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
-TEMPLATES_FILE = os.path.join(DATA_DIR, 'templates.json')
-FOODS_FILE = os.path.join(DATA_DIR, 'foods.json')
-WORKOUTS_FILE = os.path.join(DATA_DIR, 'workouts.json')
-ENTRIES_FILE = os.path.join(DATA_DIR, 'entries.json')
-
-@templates_bp.route('/api/templates', methods=['GET'])
-def get_templates():
-    """Get user's templates - lightweight summary"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    try:
-        templates = load_json(TEMPLATES_FILE)
-        user_templates = [t for t in templates if t.get('user') == session['user']]
-        
-        # Return lightweight summaries instead of full objects
-        summaries = []
-        for t in user_templates:
-            summary = {
-                'name': t.get('name'),
-                'foods_count': len(t.get('foods', [])),
-                'workouts_count': len(t.get('workouts', [])),
-                'created_at': t.get('created_at')
-            }
-            summaries.append(summary)
-        
-        return jsonify(summaries)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@templates_bp.route('/api/templates/<template_name>/details', methods=['GET'])
-def get_template_details(template_name):
-    """Get full template details (for use/manage)"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    try:
-        templates = load_json(TEMPLATES_FILE)
-        template = next((t for t in templates if 
-                        t.get('user') == session['user'] and 
-                        t.get('name') == template_name), None)
-        
-        if not template:
-            return jsonify({'error': 'Template not found'}), 404
-        
-        return jsonify(template)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@templates_bp.route('/api/templates', methods=['POST'])
-def create_template():
-    """Create a new template"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    # Rate limiting
-    rate_ok, rate_msg = check_rate_limit(session['user'], 'create_template', max_actions=10, time_window=3600)
-    if not rate_ok:
-        return jsonify({'error': rate_msg}), 429
-    
-    try:
-        data = request.get_json()
-        
-        # Validate required fields
-        if not data.get('name') or not data.get('name').strip():
-            return jsonify({'error': 'Template name is required'}), 400
-        
-        templates = load_json(TEMPLATES_FILE)
-        
-        # Check for duplicate template names for this user
-        existing = [t for t in templates if t.get('user') == session['user'] and t.get('name') == data['name']]
-        if existing:
-            return jsonify({'error': 'Template name already exists'}), 400
-        
-        # Validate foods - ensure user has permission to use each food
-        foods_data = data.get('foods', []) if data.get('includeFoods', True) else []
-        if foods_data:
-            all_foods = load_json(FOODS_FILE)
-            for food_item in foods_data:
-                # Get the food name - could be string or object
-                food_name = food_item.get('name') if isinstance(food_item, dict) else food_item
-                food = next((f for f in all_foods if f.get('name') == food_name), None)
-                
-                if not food:
-                    return jsonify({'error': f'Food "{food_name}" not found'}), 400
-                
-                # Check if user has permission to use this food
-                is_public_approved = food.get('public', True) and not food.get('pending_approval', False)
-                is_creator = food.get('creator') == session['user']
-                
-                if not (is_public_approved or is_creator):
-                    return jsonify({'error': f'You don\'t have permission to use "{food_name}" in templates'}), 403
-        
-        # Validate workouts - ensure user has permission to use each workout
-        workouts_data = data.get('workouts', []) if data.get('includeWorkouts', True) else []
-        if workouts_data:
-            all_workouts = load_json(WORKOUTS_FILE)
-            for workout_item in workouts_data:
-                # Get the workout name - could be string or object
-                workout_name = workout_item.get('name') if isinstance(workout_item, dict) else workout_item
-                workout = next((w for w in all_workouts if w.get('name') == workout_name), None)
-                
-                if not workout:
-                    return jsonify({'error': f'Workout "{workout_name}" not found'}), 400
-                
-                # Check if user has permission to use this workout
-                is_public_approved = workout.get('public', True) and not workout.get('pending_approval', False)
-                is_creator = workout.get('creator') == session['user']
-                
-                if not (is_public_approved or is_creator):
-                    return jsonify({'error': f'You don\'t have permission to use "{workout_name}" in templates'}), 403
-        
-        # Create new template
-        new_template = {
-            'name': data['name'].strip(),
-            'user': session['user'],
-            'foods': foods_data,
-            'workouts': workouts_data,
-            'created_at': get_tbilisi_date().isoformat()
-        }
-        
-        templates.append(new_template)
-        save_json(TEMPLATES_FILE, templates)
-        
-        return jsonify({'success': True, 'message': 'Template created successfully'})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@templates_bp.route('/api/templates/<template_name>', methods=['DELETE'])
-def delete_template(template_name):
-    """Delete a template"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    try:
-        templates = load_json(TEMPLATES_FILE)
-        
-        # Find and remove the template
-        original_count = len(templates)
-        templates = [t for t in templates if not (
-            t.get('user') == session['user'] and 
-            t.get('name') == template_name
-        )]
-        
-        if len(templates) < original_count:
-            save_json(TEMPLATES_FILE, templates)
-            return jsonify({'success': True, 'message': 'Template deleted successfully'})
-        else:
-            return jsonify({'error': 'Template not found or access denied'}), 404
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@templates_bp.route('/api/templates/<template_name>', methods=['PUT'])
-def update_template(template_name):
-    """Update a template"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    try:
-        data = request.get_json()
-        templates = load_json(TEMPLATES_FILE)
-        
-        # Find and update the template
-        template = next((t for t in templates if 
-                        t.get('user') == session['user'] and 
-                        t.get('name') == template_name), None)
-        
-        if not template:
-            return jsonify({'error': 'Template not found'}), 404
-        
-        # Validate foods if being updated
-        if 'foods' in data and data['foods']:
-            all_foods = load_json(FOODS_FILE)
-            for food_item in data['foods']:
-                # Get the food name - could be string or object
-                food_name = food_item.get('name') if isinstance(food_item, dict) else food_item
-                food = next((f for f in all_foods if f.get('name') == food_name), None)
-                
-                if not food:
-                    return jsonify({'error': f'Food "{food_name}" not found'}), 400
-                
-                # Check if user has permission to use this food
-                is_public_approved = food.get('public', True) and not food.get('pending_approval', False)
-                is_creator = food.get('creator') == session['user']
-                
-                if not (is_public_approved or is_creator):
-                    return jsonify({'error': f'You don\'t have permission to use "{food_name}" in templates'}), 403
-        
-        # Validate workouts if being updated
-        if 'workouts' in data and data['workouts']:
-            all_workouts = load_json(WORKOUTS_FILE)
-            for workout_item in data['workouts']:
-                # Get the workout name - could be string or object
-                workout_name = workout_item.get('name') if isinstance(workout_item, dict) else workout_item
-                workout = next((w for w in all_workouts if w.get('name') == workout_name), None)
-                
-                if not workout:
-                    return jsonify({'error': f'Workout "{workout_name}" not found'}), 400
-                
-                # Check if user has permission to use this workout
-                is_public_approved = workout.get('public', True) and not workout.get('pending_approval', False)
-                is_creator = workout.get('creator') == session['user']
-                
-                if not (is_public_approved or is_creator):
-                    return jsonify({'error': f'You don\'t have permission to use "{workout_name}" in templates'}), 403
-        
-        # Update foods and workouts
-        if 'foods' in data:
-            template['foods'] = data['foods']
-        if 'workouts' in data:
-            template['workouts'] = data['workouts']
-        
-        save_json(TEMPLATES_FILE, templates)
-        return jsonify({'success': True, 'message': 'Template updated successfully'})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@templates_bp.route('/api/templates/<template_name>/use', methods=['POST'])
-def use_template(template_name):
-    """Use a template to log entries"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    # Rate limiting
-    rate_ok, rate_msg = check_rate_limit(session['user'], 'use_template', max_actions=20, time_window=3600)
-    if not rate_ok:
-        return jsonify({'error': rate_msg}), 429
-    
-    try:
-        templates = load_json(TEMPLATES_FILE)
-        
-        # Find the template
-        template = next((t for t in templates if 
-                        t.get('user') == session['user'] and 
-                        t.get('name') == template_name), None)
-        
-        if not template:
-            return jsonify({'error': 'Template not found'}), 404
-        
-        # Load necessary data
-        foods_db = load_json(FOODS_FILE)
-        workouts_db = load_json(WORKOUTS_FILE)
-        entries = load_json(ENTRIES_FILE)
-        
-        today = get_tbilisi_date().isoformat()
-        
-        # Process foods
-        foods_to_log = []
-        if template.get('foods'):
-            for food_item in template['foods']:
-                # Handle both string names and full food objects
-                if isinstance(food_item, str):
-                    food_name = food_item
-                    food = next((f for f in foods_db if f['name'] == food_name), None)
-                    if food:
-                        food_entry = food.copy()
-                        food_entry['amount'] = food_entry.get('amount', 100)  # Default amount
-                        foods_to_log.append(food_entry)
-                else:
-                    # It's already a full food object from the template
-                    food_entry = food_item.copy()
-                    food_entry['amount'] = food_entry.get('amount', 100)  # Default amount
-                    foods_to_log.append(food_entry)
-        
-        # Process workouts
-        workouts_to_log = []
-        if template.get('workouts'):
-            for workout_item in template['workouts']:
-                # Handle both string names and full workout objects
-                if isinstance(workout_item, str):
-                    workout_name = workout_item
-                    workout = next((w for w in workouts_db if w['name'] == workout_name), None)
-                    if workout:
-                        workouts_to_log.append(workout.copy())
-                else:
-                    # It's already a full workout object from the template
-                    workouts_to_log.append(workout_item.copy())
-        
-        # Create entries based on template content
-        entries_created = 0
-        
-        if foods_to_log:
-            # Create food entry
-            food_entry = {
-                "user": session['user'],
-                "date": today,
-                "foods": foods_to_log,
-                "workouts": [],
-                "privacy": "Private"
-            }
-            entries.append(food_entry)
-            entries_created += 1
-        
-        if workouts_to_log:
-            # Create workout entry
-            workout_entry = {
-                "user": session['user'],
-                "date": today,
-                "foods": [],
-                "workouts": workouts_to_log,
-                "privacy": "Private"
-            }
-            entries.append(workout_entry)
-            entries_created += 1
-        
-        if entries_created > 0:
-            save_json(ENTRIES_FILE, entries)
-            return jsonify({
-                'success': True, 
-                'message': f'Template "{template_name}" logged successfully! Created {entries_created} entries.'
-            })
-        else:
-            return jsonify({'error': 'No valid foods or workouts found in template'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@templates_bp.route('/api/foods', methods=['GET'])
-def get_foods():
-    """Get available foods for template creation"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    try:
-        foods = load_json(FOODS_FILE)
-        # Filter foods that are public or created by the user
-        available_foods = []
-        for food in foods:
-            if food.get('public', True) and not food.get('pending_approval', False):
-                available_foods.append(food)
-            elif food.get('creator') == session['user']:
-                available_foods.append(food)
-        
-        return jsonify(available_foods)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@templates_bp.route('/api/workouts', methods=['GET'])
-def get_workouts():
-    """Get available workouts for template creation"""
-    if 'user' not in session:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    try:
-        workouts = load_json(WORKOUTS_FILE)
-        # Filter workouts that are public or created by the user
-        available_workouts = []
-        for workout in workouts:
-            if workout.get('public', True) and not workout.get('pending_approval', False):
-                available_workouts.append(workout)
-            elif workout.get('creator') == session['user']:
-                available_workouts.append(workout)
-        
-        return jsonify(available_workouts)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+from flask import Blueprint, request, session, Response
+from utils import (load_json, load_json_ro, save_json, load_index,
+                   append_entries, get_tbilisi_date,
+                   ojsonify, login_required, rate_limited,
+                   load_template_summaries, load_visible_bytes,
+                   user_templates_file)
+from utils import IO_POOL, FOODS_FILE, WORKOUTS_FILE
+
+templates_bp = Blueprint('templates', __name__)
+
+# Structural checks for a template payload, defined once at import so
+# the handlers validate shape with a single call instead of scattered
+# per-field probes. After this passes, every item is either a string or
+# a dict carrying a string 'name', so downstream loops need no guards.
+def _validate_template_shape(data, require_name=True):
+    """Return an error message for a malformed template payload, else None"""
+    if not isinstance(data, dict):
+        return 'Invalid request body'
+    if require_name:
+        name = data.get('name')
+        if not isinstance(name, str) or not name.strip():
+            return 'Template name is required'
+    for field in ('foods', 'workouts'):
+        items = data.get(field)
+        if items is None:
+            continue
+        if not isinstance(items, list):
+            return f'"{field}" must be a list'
+        for item in items:
+            if isinstance(item, str):
+                continue
+            if not isinstance(item, dict) or not isinstance(item.get('name'), str):
+                return f'Each entry in "{field}" must be a name or an object with a name'
+    return None
+
+def _allowed_names(items, user):
+    """Names a user may reference: approved public items plus their own"""
+    return {x['name'] for x in items
+            if (x.get('public', True) and not x.get('pending_approval', False))
+            or x.get('creator') == user}
+
+def _check_template_items(items_data, path, user, kind):
+    """Validate template food/workout references in bulk.
+
+    Returns an (error_response, status) tuple, or None when every
+    requested name exists and is visible to the user.
+    """
+    requested = [x.get('name') if isinstance(x, dict) else x for x in items_data]
+
+    by_name = load_index(path, 'name', lower=False)
+    for name in requested:
+        if name not in by_name:
+            return ojsonify({'error': f'{kind} "{name}" not found'}), 400
+
+    allowed = _allowed_names(load_json_ro(path), user)
+    for name in requested:
+        if name not in allowed:
+            return ojsonify({'error': f'You don\'t have permission to use "{name}" in templates'}), 403
+
+    return None
+
+@templates_bp.route('/api/templates', methods=['GET'])
+@login_required
+def get_templates():
+    """Get user's templates - lightweight summary"""
+    try:
+        # Streamed summary rows: template contents are counted during the
+        # parse, never materialized, and the rows are cached per mtime
+        user = session['user']
+        summaries = [{
+            'name': t['name'],
+            'foods_count': t['foods_count'],
+            'workouts_count': t['workouts_count'],
+            'created_at': t['created_at']
+        } for t in load_template_summaries(user_templates_file(user))]
+
+        return ojsonify(summaries)
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+@templates_bp.route('/api/templates/<template_name>/details', methods=['GET'])
+@login_required
+def get_template_details(template_name):
+    """Get full template details (for use/manage)"""
+    try:
+        user_file = user_templates_file(session['user'])
+        templates = load_json_ro(user_file)
+        idx = load_index(user_file, 'name', lower=False).get(template_name)
+        template = templates[idx] if idx is not None else None
+
+        if not template:
+            return ojsonify({'error': 'Template not found'}), 404
+
+        return ojsonify(template)
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+@templates_bp.route('/api/templates', methods=['POST'])
+@login_required
+@rate_limited('create_template', max_actions=10, time_window=3600)
+def create_template():
+    """Create a new template"""
+    try:
+        user = session['user']
+        data = request.get_json()
+
+        # One structural pass up front; field checks below can assume shape
+        error = _validate_template_shape(data)
+        if error:
+            return ojsonify({'error': error}), 400
+
+        user_file = user_templates_file(user)
+        templates = load_json(user_file)
+
+        # Duplicate check is one membership probe on the cached name index
+        if data['name'] in load_index(user_file, 'name', lower=False):
+            return ojsonify({'error': 'Template name already exists'}), 400
+        
+        # Validate foods and workouts - every reference must exist and be
+        # visible to this user
+        foods_data = data.get('foods', []) if data.get('includeFoods', True) else []
+        if foods_data:
+            error = _check_template_items(foods_data, FOODS_FILE, user, 'Food')
+            if error:
+                return error
+
+        workouts_data = data.get('workouts', []) if data.get('includeWorkouts', True) else []
+        if workouts_data:
+            error = _check_template_items(workouts_data, WORKOUTS_FILE, user, 'Workout')
+            if error:
+                return error
+        
+        # Create new template
+        new_template = {
+            'name': data['name'].strip(),
+            'user': user,
+            'foods': foods_data,
+            'workouts': workouts_data,
+            'created_at': get_tbilisi_date().isoformat()
+        }
+        
+        templates.append(new_template)
+        save_json(user_file, templates)
+        
+        return ojsonify({'success': True, 'message': 'Template created successfully'})
+        
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+@templates_bp.route('/api/templates/<template_name>', methods=['DELETE'])
+@login_required
+def delete_template(template_name):
+    """Delete a template"""
+    try:
+        user_file = user_templates_file(session['user'])
+        templates = load_json(user_file)
+
+        # Find and remove the template
+        idx = load_index(user_file, 'name', lower=False).get(template_name)
+
+        if idx is not None:
+            del templates[idx]
+            save_json(user_file, templates)
+            return ojsonify({'success': True, 'message': 'Template deleted successfully'})
+        else:
+            return ojsonify({'error': 'Template not found or access denied'}), 404
+            
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+@templates_bp.route('/api/templates/<template_name>', methods=['PUT'])
+@login_required
+def update_template(template_name):
+    """Update a template"""
+    try:
+        user = session['user']
+        data = request.get_json()
+
+        # Updates carry only the fields being changed; the name comes
+        # from the URL, so shape-check without requiring it in the body
+        error = _validate_template_shape(data, require_name=False)
+        if error:
+            return ojsonify({'error': error}), 400
+
+        user_file = user_templates_file(user)
+        templates = load_json(user_file)
+
+        # Find and update the template
+        idx = load_index(user_file, 'name', lower=False).get(template_name)
+        template = templates[idx] if idx is not None else None
+
+        if not template:
+            return ojsonify({'error': 'Template not found'}), 404
+        
+        # Validate foods and workouts if being updated
+        if 'foods' in data and data['foods']:
+            error = _check_template_items(data['foods'], FOODS_FILE, user, 'Food')
+            if error:
+                return error
+
+        if 'workouts' in data and data['workouts']:
+            error = _check_template_items(data['workouts'], WORKOUTS_FILE, user, 'Workout')
+            if error:
+                return error
+        
+        # Update foods and workouts
+        if 'foods' in data:
+            template['foods'] = data['foods']
+        if 'workouts' in data:
+            template['workouts'] = data['workouts']
+        
+        save_json(user_file, templates)
+        return ojsonify({'success': True, 'message': 'Template updated successfully'})
+        
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+@templates_bp.route('/api/templates/<template_name>/use', methods=['POST'])
+@login_required
+@rate_limited('use_template', max_actions=20, time_window=3600)
+def use_template(template_name):
+    """Use a template to log entries"""
+    try:
+        user = session['user']
+
+        # Kick off all three file loads together; on a cold cache the
+        # wait is the slowest single read instead of the sum, and on a
+        # warm cache the futures return instantly
+        user_file = user_templates_file(user)
+        futures = {path: IO_POOL.submit(load_json_ro, path)
+                   for path in (user_file, FOODS_FILE, WORKOUTS_FILE)}
+        templates = futures[user_file].result()
+
+        # Find the template
+        idx = load_index(user_file, 'name', lower=False).get(template_name)
+        template = templates[idx] if idx is not None else None
+
+        if not template:
+            futures[FOODS_FILE].result()
+            futures[WORKOUTS_FILE].result()
+            return ojsonify({'error': 'Template not found'}), 404
+
+        foods_db = futures[FOODS_FILE].result()
+        futures[WORKOUTS_FILE].result()
+        foods_by_name = load_index(FOODS_FILE, 'name', lower=False)
+        workouts_by_name = load_index(WORKOUTS_FILE, 'name', lower=False)
+
+        today = get_tbilisi_date().isoformat()
+
+        # Process foods into slim entries: name, macros and amount only -
+        # creator/categories/approval flags stay in the foods DB
+        foods_to_log = []
+        if template.get('foods'):
+            for food_item in template['foods']:
+                # Handle both string names and full food objects
+                if isinstance(food_item, str):
+                    name, amount, fallback = food_item, 100, None
+                else:
+                    name = food_item.get('name')
+                    amount = food_item.get('amount', 100)
+                    fallback = food_item
+                idx = foods_by_name.get(name)
+                source = foods_db[idx] if idx is not None else fallback
+                if source:
+                    foods_to_log.append({
+                        "name": name,
+                        "calories": source.get('calories', 0),
+                        "protein": source.get('protein', 0),
+                        "carbs": source.get('carbs', 0),
+                        "fat": source.get('fat', 0),
+                        "amount": amount
+                    })
+
+        # Process workouts - keep the name plus any exercise parameters the
+        # template carries, dropping the DB bookkeeping fields
+        workouts_to_log = []
+        if template.get('workouts'):
+            for workout_item in template['workouts']:
+                # Handle both string names and full workout objects
+                if isinstance(workout_item, str):
+                    if workout_item in workouts_by_name:
+                        workouts_to_log.append({"name": workout_item})
+                else:
+                    slim = {"name": workout_item.get('name')}
+                    for key in ('sets', 'reps', 'weight', 'duration', 'speed'):
+                        if key in workout_item:
+                            slim[key] = workout_item[key]
+                    workouts_to_log.append(slim)
+        
+        # Create entries based on template content
+        new_entries = []
+
+        if foods_to_log:
+            # Create food entry
+            new_entries.append({
+                "user": user,
+                "date": today,
+                "foods": foods_to_log,
+                "workouts": [],
+                "privacy": "Private"
+            })
+
+        if workouts_to_log:
+            # Create workout entry
+            new_entries.append({
+                "user": user,
+                "date": today,
+                "foods": [],
+                "workouts": workouts_to_log,
+                "privacy": "Private"
+            })
+
+        entries_created = len(new_entries)
+        if entries_created > 0:
+            # O(new records) append to the JSONL log, not a full rewrite
+            append_entries(new_entries)
+            return ojsonify({
+                'success': True, 
+                'message': f'Template "{template_name}" logged successfully! Created {entries_created} entries.'
+            })
+        else:
+            return ojsonify({'error': 'No valid foods or workouts found in template'}), 400
+            
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+@templates_bp.route('/api/foods', methods=['GET'])
+@login_required
+def get_foods():
+    """Get available foods for template creation"""
+    try:
+        # Serialized once per file change; repeat requests reuse the bytes
+        # and unchanged polls short-circuit to 304 on the content ETag
+        body, etag = load_visible_bytes(FOODS_FILE, session['user'], include_own_pending=True)
+        if etag and request.headers.get('If-None-Match') == etag:
+            return '', 304
+        response = Response(body, mimetype='application/json')
+        if etag:
+            response.headers['ETag'] = etag
+        return response
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+@templates_bp.route('/api/workouts', methods=['GET'])
+@login_required
+def get_workouts():
+    """Get available workouts for template creation"""
+    try:
+        # Serialized once per file change; repeat requests reuse the bytes
+        # and unchanged polls short-circuit to 304 on the content ETag
+        body, etag = load_visible_bytes(WORKOUTS_FILE, session['user'], include_own_pending=True)
+        if etag and request.headers.get('If-None-Match') == etag:
+            return '', 304
+        response = Response(body, mimetype='application/json')
+        if etag:
+            response.headers['ETag'] = etag
+        return response
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -7,6 +7,7 @@ Test script to verify the fixes for:
 
 import json
 import os
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 
 # Tbilisi timezone
@@ -30,6 +31,19 @@ def load_json(path):
     except (json.JSONDecodeError, IOError):
         return [] if 'rate_limits' not in path else {}
 
+def group_users_by_role(users):
+    """One pass over users instead of a next() scan per role probe"""
+    by_role = {}
+    for u in users:
+        by_role.setdefault(u.get('role'), []).append(u)
+    return by_role
+
+def first_non_admin(users_by_role):
+    for role, members in users_by_role.items():
+        if role != 'admin' and members:
+            return members[0]
+    return None
+
 def test_food_deletion_logic():
     """Test that deletion logic correctly identifies permissions"""
     print("\n" + "="*60)
@@ -39,11 +53,10 @@ def test_food_deletion_logic():
     foods = load_json(FOODS_FILE)
     users = load_json(USERS_FILE)
     
-    # Find an admin user
-    admin_user = next((u for u in users if u.get('role') == 'admin'), None)
-    
-    # Find a regular user
-    regular_user = next((u for u in users if u.get('role') != 'admin'), None)
+    # Index users by role once; the per-role probes become dict lookups
+    users_by_role = group_users_by_role(users)
+    admin_user = next(iter(users_by_role.get('admin', [])), None)
+    regular_user = first_non_admin(users_by_role)
     
     # Find a public approved food
     public_food = next((f for f in foods if f.get('public') and not f.get('pending_approval')), None)
@@ -104,8 +117,8 @@ def test_template_food_validation():
     foods = load_json(FOODS_FILE)
     users = load_json(USERS_FILE)
     
-    regular_user = next((u for u in users if u.get('role') != 'admin'), None)
-    
+    regular_user = first_non_admin(group_users_by_role(users))
+
     if not regular_user:
         print("❌ No regular user found, skipping test")
         return
@@ -172,21 +185,25 @@ def test_data_integrity():
     print(f"✓ Total workouts: {len(workouts)}")
     print(f"✓ Total users: {len(users)}")
     
-    # Check food structure
-    public_count = sum(1 for f in foods if f.get('public', True))
-    private_count = sum(1 for f in foods if not f.get('public', True))
-    pending_count = sum(1 for f in foods if f.get('pending_approval', False))
-    
+    # Check food structure - one scan yields all three counts
+    food_flags = Counter((bool(f.get('public', True)), bool(f.get('pending_approval', False)))
+                         for f in foods)
+    public_count = food_flags[(True, False)] + food_flags[(True, True)]
+    private_count = food_flags[(False, False)] + food_flags[(False, True)]
+    pending_count = food_flags[(True, True)] + food_flags[(False, True)]
+
     print(f"\n[Foods]")
     print(f"  - Public: {public_count}")
     print(f"  - Private: {private_count}")
     print(f"  - Pending approval: {pending_count}")
     
-    # Check workout structure
-    workout_public = sum(1 for w in workouts if w.get('public', True))
-    workout_private = sum(1 for w in workouts if not w.get('public', True))
-    workout_pending = sum(1 for w in workouts if w.get('pending_approval', False))
-    
+    # Check workout structure - same single-scan counting
+    workout_flags = Counter((bool(w.get('public', True)), bool(w.get('pending_approval', False)))
+                            for w in workouts)
+    workout_public = workout_flags[(True, False)] + workout_flags[(True, True)]
+    workout_private = workout_flags[(False, False)] + workout_flags[(False, True)]
+    workout_pending = workout_flags[(True, True)] + workout_flags[(False, True)]
+
     print(f"\n[Workouts]")
     print(f"  - Public: {workout_public}")
     print(f"  - Private: {workout_private}")
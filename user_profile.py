@@ -1,13 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from utils import load_json, save_json, get_user, check_rate_limit, validate_numeric_input
-import os
+from utils import load_json, save_json, load_index, get_user, check_rate_limit, validate_numeric_input
+from utils import USERS_FILE
 
 # Create the Blueprint
 user_profile_bp = Blueprint('user_profile', __name__)
 
-# Data file paths
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
-USERS_FILE = os.path.join(DATA_DIR, 'users.json')
+# Field groups the profile forms validate, hoisted so POST handlers
+# don't rebuild the lists per request
+_NUMERIC_FIELDS = ('calorie_goal', 'protein_goal', 'carb_goal', 'fat_goal', 'weight', 'height', 'age')
+_TEXT_FIELDS = ('gender', 'activity_level', 'goal')
 
 @user_profile_bp.route('/profile')
 def profile():
@@ -40,14 +41,10 @@ def edit_profile():
         
         try:
             users = load_json(USERS_FILE)
-            
-            # Find user index
-            user_index = -1
-            for i, u in enumerate(users):
-                if u['username'] == session['user']:
-                    user_index = i
-                    break
-            
+
+            # One probe on the cached username index instead of a scan
+            user_index = load_index(USERS_FILE, 'username', lower=False).get(session['user'], -1)
+
             if user_index == -1:
                 flash('User not found.', 'error')
                 return render_template('profile.html', user=user)
@@ -56,8 +53,7 @@ def edit_profile():
             profile_data = users[user_index].get('profile', {})
             
             # Validate and update numeric fields
-            numeric_fields = ['calorie_goal', 'protein_goal', 'carb_goal', 'fat_goal', 'weight', 'height', 'age']
-            for field in numeric_fields:
+            for field in _NUMERIC_FIELDS:
                 value = request.form.get(field)
                 if value and value.strip():
                     valid, num_value = validate_numeric_input(value, field, 0, 10000)
@@ -68,8 +64,7 @@ def edit_profile():
                         return render_template('profile.html', user=user)
             
             # Update text fields (including activity_level)
-            text_fields = ['gender', 'activity_level', 'goal']
-            for field in text_fields:
+            for field in _TEXT_FIELDS:
                 value = request.form.get(field)
                 if value and value.strip():
                     profile_data[field] = value.strip()
@@ -104,14 +99,10 @@ def onboarding():
     if request.method == 'POST':
         try:
             users = load_json(USERS_FILE)
-            
-            # Find user index
-            user_index = -1
-            for i, u in enumerate(users):
-                if u['username'] == session['user']:
-                    user_index = i
-                    break
-            
+
+            # One probe on the cached username index instead of a scan
+            user_index = load_index(USERS_FILE, 'username', lower=False).get(session['user'], -1)
+
             if user_index == -1:
                 flash('User not found.', 'error')
                 return redirect(url_for('auth.login'))
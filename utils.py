@@ -1,111 +1,732 @@
 import os
 import json
+import copy
+import hashlib
+import orjson
+import ijson
+import numpy as np
 from datetime import datetime, timedelta, timezone
-from flask import session
+from flask import session, g, has_request_context, Response
 import re
 import tempfile
-import shutil
+import fcntl
+import threading
+import queue
+import atexit
+import time
+from collections import deque
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+import argon2
+
+# Shared pool for overlapping independent file loads; reads and orjson
+# parsing both release the GIL, so cold loads genuinely run in parallel
+IO_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Argon2id hasher for passwords. The C libargon2 backend buys far more
+# brute-force resistance per millisecond than werkzeug's pure-Python
+# PBKDF2 loop; parameters tuned so hashing stays around half a second.
+_ph = argon2.PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
 
 # Tbilisi timezone (UTC+4, no DST in Georgia)
 TBILISI_TZ = timezone(timedelta(hours=4))
 
 def get_tbilisi_date():
-    """Get today's date in Tbilisi timezone"""
+    """Get today's date in Tbilisi timezone, memoized per request"""
+    if has_request_context():
+        cached = getattr(g, '_tbilisi_date', None)
+        if cached is None:
+            cached = g._tbilisi_date = datetime.now(TBILISI_TZ).date()
+        return cached
     return datetime.now(TBILISI_TZ).date()
 
 def get_tbilisi_datetime():
     """Get current datetime in Tbilisi timezone"""
     return datetime.now(TBILISI_TZ)
 
-# Data paths
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+# Data paths. LIFETRACK_DATA_DIR lets deployments point the store at a
+# faster filesystem (e.g. a tmpfs like /dev/shm that is rsynced to
+# persistent storage) without touching the code; the default stays the
+# repo-local data directory.
+DATA_DIR = os.environ.get('LIFETRACK_DATA_DIR') or os.path.join(os.path.dirname(__file__), 'data')
+os.makedirs(DATA_DIR, exist_ok=True)
 USERS_FILE = os.path.join(DATA_DIR, 'users.json')
 FOODS_FILE = os.path.join(DATA_DIR, 'foods.json')
 WORKOUTS_FILE = os.path.join(DATA_DIR, 'workouts.json')
-ENTRIES_FILE = os.path.join(DATA_DIR, 'entries.json')
+TEMPLATES_FILE = os.path.join(DATA_DIR, 'templates.json')  # legacy single-file store
+TEMPLATES_DIR = os.path.join(DATA_DIR, 'templates')
+
+def user_templates_file(username):
+    """Per-user template store: writes touch only the owner's file.
+
+    Usernames are restricted to letters, digits, spaces, hyphens and
+    apostrophes at signup, so they are safe as filenames.
+    """
+    return os.path.join(TEMPLATES_DIR, f'{username}.json')
+# Entries live in an append-only JSONL log so logging a new entry is a
+# single O(1) append instead of a full-file rewrite.
+ENTRIES_FILE = os.path.join(DATA_DIR, 'entries.jsonl')
+_LEGACY_ENTRIES_FILE = os.path.join(DATA_DIR, 'entries.json')
+
+# In-process cache of parsed JSON files keyed by path. Each entry stores
+# (st_mtime_ns, st_size, parsed_data); while the file on disk is unchanged,
+# load_json skips both the disk read and the json parse.
+_JSON_CACHE = {}
 
 def load_json(path):
     """Load JSON file, create empty array if doesn't exist"""
+    # A queued background write is newer than whatever is on disk
+    with _WRITE_LOCK:
+        pending = _PENDING_WRITES.get(path)
+    if pending is not None:
+        return copy.deepcopy(pending)
+
     if not os.path.exists(path):
         # Return appropriate default based on filename
         if 'rate_limits' in path:
             return {}  # Dictionary for rate limits
         return []  # List for other files
-    
+
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Validate data type based on filename
-            if 'rate_limits' in path and not isinstance(data, dict):
-                return {}
-            elif 'rate_limits' not in path and not isinstance(data, list):
-                return []
-            return data
-    except (json.JSONDecodeError, IOError):
+        st = os.stat(path)
+        cached = _JSON_CACHE.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            # Cache hit - return a copy so callers can mutate freely
+            return copy.deepcopy(cached[2])
+
+        # Read the whole file in one go; orjson parses several times faster
+        # than the stdlib on these dict/list-heavy payloads
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if path.endswith('.jsonl'):
+            data = [orjson.loads(line) for line in raw.splitlines() if line.strip()]
+        else:
+            data = orjson.loads(raw)
+        # Validate data type based on filename
+        if 'rate_limits' in path and not isinstance(data, dict):
+            return {}
+        elif 'rate_limits' not in path and not isinstance(data, list):
+            return []
+        _JSON_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+        return copy.deepcopy(data)
+    except (orjson.JSONDecodeError, IOError, OSError):
         # Return appropriate default on error
         if 'rate_limits' in path:
             return {}
         return []
 
+def load_json_ro(path):
+    """load_json without the defensive deepcopy.
+
+    Returns the cached object itself, so callers must treat the result
+    as read-only; use load_json when the data will be mutated and saved.
+    """
+    with _WRITE_LOCK:
+        pending = _PENDING_WRITES.get(path)
+    if pending is not None:
+        return pending
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {} if 'rate_limits' in path else []
+    cached = _JSON_CACHE.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    # Populate the cache, then hand back the shared object
+    load_json(path)
+    cached = _JSON_CACHE.get(path)
+    if cached:
+        return cached[2]
+    return {} if 'rate_limits' in path else []
+
+# Secondary indexes built on top of cached JSON lists, keyed by
+# (path, field, lower) and invalidated together with the file.
+_INDEX_CACHE = {}
+
+def load_index(path, field, lower=True):
+    """Return a {field_value: list_index} dict for a JSON list file.
+
+    The index is rebuilt only when the underlying file changes, so lookups
+    that previously scanned the whole list become O(1) dict hits.
+    """
+    # While a write is queued for this file the on-disk stamp is stale,
+    # so rebuild from the pending data and don't cache against it. A
+    # missing file is routine in that state (e.g. a user's first
+    # template, still in the queue), so a failed stat also falls through
+    # to load_json, which serves the pending payload.
+    with _WRITE_LOCK:
+        dirty = path in _PENDING_WRITES
+
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    key = (path, field, lower)
+    cached = None if (dirty or stamp is None) else _INDEX_CACHE.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    items = load_json(path)
+    if not isinstance(items, list):
+        return {}
+
+    index = {}
+    for i, item in enumerate(items):
+        value = item.get(field) if isinstance(item, dict) else None
+        if isinstance(value, str):
+            index[value.lower() if lower else value] = i
+
+    if not dirty and stamp is not None:
+        _INDEX_CACHE[key] = (stamp, index)
+    return index
+
+# Indices of records flagged pending_approval, keyed by path and
+# invalidated together with the file.
+_PENDING_CACHE = {}
+
+def load_pending(path):
+    """Return list indices of records awaiting approval in a JSON list file.
+
+    In steady state almost no records are pending, so caching the few
+    pending indices avoids rescanning the whole list on every dashboard hit.
+    """
+    with _WRITE_LOCK:
+        dirty = path in _PENDING_WRITES
+
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    cached = None if (dirty or stamp is None) else _PENDING_CACHE.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    items = load_json(path)
+    if not isinstance(items, list):
+        return []
+
+    pending = [i for i, item in enumerate(items)
+               if isinstance(item, dict) and item.get('pending_approval', False)]
+    if not dirty and stamp is not None:
+        _PENDING_CACHE[path] = (stamp, pending)
+    return pending
+
+# Background writer: save_json records the payload and returns without
+# touching the disk; a single daemon thread performs the actual writes,
+# keeping only the newest queued state per file so bursts coalesce.
+_WRITE_LOCK = threading.Lock()
+_PENDING_WRITES = {}
+_WRITE_QUEUE = queue.Queue()
+
+def _writer_loop():
+    while True:
+        path = _WRITE_QUEUE.get()
+        with _WRITE_LOCK:
+            data = _PENDING_WRITES.get(path)
+        if data is None:
+            continue  # a newer queue item or flush already wrote this path
+        safe_save_json(path, data)
+        with _WRITE_LOCK:
+            if _PENDING_WRITES.get(path) is data:
+                del _PENDING_WRITES[path]
+
+_WRITER = threading.Thread(target=_writer_loop, daemon=True)
+_WRITER.start()
+
+def flush_writes():
+    """Synchronously write out every queued save (registered at exit)"""
+    while True:
+        with _WRITE_LOCK:
+            items = list(_PENDING_WRITES.items())
+        if not items:
+            return
+        for path, data in items:
+            safe_save_json(path, data)
+            with _WRITE_LOCK:
+                if _PENDING_WRITES.get(path) is data:
+                    del _PENDING_WRITES[path]
+
+atexit.register(flush_writes)
+
 def save_json(path, data):
-    """Save data to JSON file with backup protection"""
-    return safe_save_json(path, data)
+    """Queue data for a background write; readers see the new state at once"""
+    with _WRITE_LOCK:
+        _PENDING_WRITES[path] = copy.deepcopy(data)
+    _WRITE_QUEUE.put(path)
+    return True
+
+def ojsonify(data, status=200):
+    """jsonify drop-in that serializes with orjson instead of stdlib json"""
+    return Response(orjson.dumps(data), status=status, mimetype='application/json')
+
+# Visible-items partition per file, keyed by its stamp: the approved
+# public list is shared across users, private items are grouped by creator.
+_VISIBLE_CACHE = {}
+
+def load_visible(path, username, include_own_pending=False):
+    """Items a user may see: approved public ones plus their own private ones.
+
+    With include_own_pending the user's still-pending public submissions
+    are included too (the template pickers show those; the logging pages
+    don't). The common all-public case returns the cached list with one
+    dict lookup instead of re-filtering the whole list per request.
+    """
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    with _WRITE_LOCK:
+        dirty = path in _PENDING_WRITES
+
+    cached = None if dirty else _VISIBLE_CACHE.get(path)
+    if cached and cached[0] == stamp:
+        _, public_approved, private_by_creator, pending_by_creator = cached
+    else:
+        public_approved = []
+        private_by_creator = {}
+        pending_by_creator = {}
+        for item in load_json(path):
+            if item.get('public', True):
+                if not item.get('pending_approval', False):
+                    public_approved.append(item)
+                else:
+                    pending_by_creator.setdefault(item.get('creator'), []).append(item)
+            else:
+                private_by_creator.setdefault(item.get('creator'), []).append(item)
+        if not dirty:
+            _VISIBLE_CACHE[path] = (stamp, public_approved, private_by_creator, pending_by_creator)
+
+    result = public_approved
+    private = private_by_creator.get(username)
+    if private:
+        result = result + private
+    if include_own_pending:
+        pending = pending_by_creator.get(username)
+        if pending:
+            result = result + pending
+    return result
+
+def load_visible_foods(username):
+    """Foods a user may log: approved public ones plus their own private ones"""
+    return load_visible(FOODS_FILE, username)
+
+# Serialized response bodies and their content-hash ETags for the
+# per-user visible lists, rebuilt once per file change rather than
+# per request.
+_VISIBLE_BYTES = {}
+
+def load_visible_bytes(path, username, include_own_pending=False):
+    """(body, etag) for the load_visible response a user would get right now.
+
+    The list is serialized and hashed once per (file, user) per mtime;
+    every later request for the same generation reuses the bytes, and
+    polling clients that already hold them get a 304 from the ETag.
+    While a background write is queued the body is built fresh and the
+    etag is None, which simply disables the 304 path for that request.
+    """
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    with _WRITE_LOCK:
+        dirty = path in _PENDING_WRITES
+    if dirty:
+        return orjson.dumps(load_visible(path, username, include_own_pending)), None
+
+    key = (path, username, include_own_pending)
+    cached = _VISIBLE_BYTES.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1], cached[2]
+
+    body = orjson.dumps(load_visible(path, username, include_own_pending))
+    etag = '"' + hashlib.blake2s(body, digest_size=8).hexdigest() + '"'
+    _VISIBLE_BYTES[key] = (stamp, body, etag)
+    return body, etag
+
+_SUMMARY_CACHE = {}
+
+def _summarize_template(t):
+    return {
+        'user': t.get('user'),
+        'name': t.get('name'),
+        'foods_count': len(t.get('foods') or ()),
+        'workouts_count': len(t.get('workouts') or ()),
+        'created_at': t.get('created_at')
+    }
+
+def load_template_summaries(path):
+    """Summary rows for every template, without materializing their contents.
+
+    The list endpoint only needs name, owner, created_at and the item
+    counts, so the file is walked with ijson's event stream: embedded
+    food/workout dicts are counted as they go by and never built. Cached
+    per mtime like the other derived views.
+    """
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    with _WRITE_LOCK:
+        pending = _PENDING_WRITES.get(path)
+    if pending is not None:
+        # A write is still queued; summarize the in-memory state directly
+        return [_summarize_template(t) for t in pending]
+
+    cached = _SUMMARY_CACHE.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    summaries = []
+    current = None
+    try:
+        with open(path, 'rb') as f:
+            for prefix, event, value in ijson.parse(f):
+                if prefix == 'item':
+                    if event == 'start_map':
+                        current = {'user': None, 'name': None, 'foods_count': 0,
+                                   'workouts_count': 0, 'created_at': None}
+                    elif event == 'end_map':
+                        summaries.append(current)
+                        current = None
+                elif current is not None:
+                    if prefix == 'item.user':
+                        current['user'] = value
+                    elif prefix == 'item.name':
+                        current['name'] = value
+                    elif prefix == 'item.created_at':
+                        current['created_at'] = value
+                    elif prefix == 'item.foods.item' and event in ('start_map', 'string'):
+                        current['foods_count'] += 1
+                    elif prefix == 'item.workouts.item' and event in ('start_map', 'string'):
+                        current['workouts_count'] += 1
+    except OSError:
+        return []
+
+    _SUMMARY_CACHE[path] = (stamp, summaries)
+    return summaries
+
+def file_stamp(path):
+    """mtime stamp for ETags and cache keys, or None while a write is queued.
+
+    While a save sits in the write-behind queue the on-disk mtime still
+    describes the previous generation, so handlers must not hand it out
+    as an ETag or reuse cached bodies keyed on it; returning None tells
+    them to serve a fresh, uncached response for that request.
+    """
+    with _WRITE_LOCK:
+        if path in _PENDING_WRITES:
+            return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def read_bytes(path):
+    """Raw bytes of a JSON file, for responses that pass it through verbatim.
+
+    Skips the parse/re-encode round trip entirely; if a background write
+    is still queued for the file, the pending state is serialized instead
+    so callers never see bytes older than the cache.
+    """
+    with _WRITE_LOCK:
+        pending = _PENDING_WRITES.get(path)
+    if pending is not None:
+        return orjson.dumps(pending, option=orjson.OPT_INDENT_2)
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return b'[]'
+
+# Content hash of the last payload written per path, used to skip
+# writes that would leave the file byte-identical.
+_SAVE_HASHES = {}
 
 def safe_save_json(filepath, data):
-    """Safely save JSON with backup and validation"""
+    """Atomically write JSON: same-dir temp file, fsync, then rename over"""
     try:
-        # Create backup
-        backup_path = f"{filepath}.backup"
-        if os.path.exists(filepath):
-            shutil.copy2(filepath, backup_path)
-        
-        # Write to temporary file first
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.tmp') as tmp_file:
-            json.dump(data, tmp_file, indent=2)
-            temp_path = tmp_file.name
-        
-        # Validate the temporary file
-        with open(temp_path, 'r') as f:
-            json.load(f)  # This will raise an exception if invalid
-        
-        # Move temp file to final location
-        shutil.move(temp_path, filepath)
-        
-        # Remove backup if successful
-        if os.path.exists(backup_path):
-            os.remove(backup_path)
-            
+        # Serialize once up front so the same bytes are hashed and written
+        if filepath.endswith('.jsonl'):
+            payload = b''.join(orjson.dumps(record) + b'\n' for record in data)
+        else:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+        # Skip the disk write entirely when nothing actually changed
+        # (e.g. re-approving an already-approved item)
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        if _SAVE_HASHES.get(filepath) == digest and os.path.exists(filepath):
+            return True
+
+        # Interlock writers (background thread, exit flush, other worker
+        # processes) on a sidecar lock file so two writes can't interleave
+        # and publish torn JSON
+        lock_fd = os.open(f"{filepath}.lock", os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+            # Keep the previous generation reachable as <file>.backup via a
+            # hardlink: one directory entry, zero bytes copied. After the
+            # rename below the link still points at the old inode.
+            backup_path = f"{filepath}.backup"
+            if os.path.exists(filepath):
+                try:
+                    if os.path.exists(backup_path):
+                        os.remove(backup_path)
+                    os.link(filepath, backup_path)
+                except OSError:
+                    pass  # backup is best-effort; the rename is still atomic
+
+            # Write to a temp file in the same directory, flush it to disk,
+            # then atomically swap it in - a crash mid-write can't truncate
+            # the data file and readers never observe a partial write
+            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.tmp',
+                                             dir=os.path.dirname(filepath) or '.') as tmp_file:
+                tmp_file.write(payload)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+                temp_path = tmp_file.name
+
+            os.replace(temp_path, filepath)
+
+            # Refresh the in-process cache so the next load_json skips the re-parse
+            st = os.stat(filepath)
+            _JSON_CACHE[filepath] = (st.st_mtime_ns, st.st_size, copy.deepcopy(data))
+            _SAVE_HASHES[filepath] = digest
+        finally:
+            os.close(lock_fd)
+
         return True
     except Exception as e:
-        # Restore from backup if it exists
-        if os.path.exists(backup_path):
-            shutil.copy2(backup_path, filepath)
-        
         # Clean up temp file
         if 'temp_path' in locals() and os.path.exists(temp_path):
             os.remove(temp_path)
-            
+
         return False
 
+def append_entries(records):
+    """Append new entries to the log without rewriting the whole file"""
+    if isinstance(records, dict):
+        records = [records]
+    if not records:
+        return True
+
+    # If a full-list rewrite is queued for the log, fold the new records
+    # into that pending payload instead of writing around it - otherwise
+    # the writer would flush its pre-append snapshot over the file and
+    # drop these records. The payload is replaced (not mutated) so the
+    # writer's identity check requeues the combined list.
+    with _WRITE_LOCK:
+        pending = _PENDING_WRITES.get(ENTRIES_FILE)
+        if pending is not None:
+            _PENDING_WRITES[ENTRIES_FILE] = pending + copy.deepcopy(records)
+    if pending is not None:
+        _WRITE_QUEUE.put(ENTRIES_FILE)
+        return True
+
+    try:
+        with open(ENTRIES_FILE, 'ab') as f:
+            for record in records:
+                f.write(orjson.dumps(record) + b'\n')
+
+        # The file no longer matches the last fully-written payload
+        _SAVE_HASHES.pop(ENTRIES_FILE, None)
+
+        # Extend the cache in place so readers don't re-parse the log
+        st = os.stat(ENTRIES_FILE)
+        cached = _JSON_CACHE.get(ENTRIES_FILE)
+        if cached:
+            _JSON_CACHE[ENTRIES_FILE] = (
+                st.st_mtime_ns, st.st_size,
+                cached[2] + copy.deepcopy(records)
+            )
+        return True
+    except (IOError, OSError):
+        return False
+
+def iter_entries():
+    """Yield entries from the log one at a time.
+
+    Streams the JSONL file line by line so callers that filter as they go
+    never materialize the full history in memory.
+    """
+    # A queued rewrite supersedes the on-disk file: yield the pending
+    # payload so callers never see entries a flush hasn't landed yet
+    with _WRITE_LOCK:
+        pending = _PENDING_WRITES.get(ENTRIES_FILE)
+    if pending is not None:
+        for entry in pending:
+            yield copy.deepcopy(entry)
+        return
+    try:
+        with open(ENTRIES_FILE, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+    except (orjson.JSONDecodeError, IOError, OSError):
+        return
+
+def _migrate_legacy_entries():
+    """One-shot migration of the old entries.json array to entries.jsonl"""
+    if os.path.exists(ENTRIES_FILE) or not os.path.exists(_LEGACY_ENTRIES_FILE):
+        return
+    try:
+        with open(_LEGACY_ENTRIES_FILE, 'rb') as f:
+            entries = orjson.loads(f.read())
+        if isinstance(entries, list):
+            with open(ENTRIES_FILE, 'wb') as f:
+                for entry in entries:
+                    f.write(orjson.dumps(entry) + b'\n')
+    except (orjson.JSONDecodeError, IOError):
+        pass
+
+_migrate_legacy_entries()
+
+def _migrate_legacy_templates():
+    """One-shot split of the shared templates.json into per-user files"""
+    os.makedirs(TEMPLATES_DIR, exist_ok=True)
+    if not os.path.exists(TEMPLATES_FILE):
+        return
+    try:
+        with open(TEMPLATES_FILE, 'rb') as f:
+            templates = orjson.loads(f.read())
+        if isinstance(templates, list):
+            by_user = {}
+            for t in templates:
+                by_user.setdefault(t.get('user'), []).append(t)
+            for username, rows in by_user.items():
+                path = user_templates_file(username)
+                if username and not os.path.exists(path):
+                    with open(path, 'wb') as f:
+                        f.write(orjson.dumps(rows, option=orjson.OPT_INDENT_2))
+        # Rename rather than delete so the legacy data stays recoverable
+        os.replace(TEMPLATES_FILE, TEMPLATES_FILE + '.migrated')
+    except (orjson.JSONDecodeError, IOError, OSError):
+        pass
+
+_migrate_legacy_templates()
+
 def get_user(username):
     """Get user by username"""
     if not username:
         return None
+
+    # Memoize per request on flask.g - validate_session plus the view each
+    # resolve the same user, and g is discarded when the request ends
+    if has_request_context():
+        cached = getattr(g, '_cached_user', None)
+        if cached is not None and cached.get('username') == username:
+            return cached
+
+    # Cold-cache fast path for large user tables: stream the file and
+    # stop at the first match instead of materializing every record.
+    # Small files (and anything already cached or pending a write) go
+    # through the normal cached load below.
+    with _WRITE_LOCK:
+        dirty = USERS_FILE in _PENDING_WRITES
+    if not dirty and USERS_FILE not in _JSON_CACHE:
+        try:
+            if os.path.getsize(USERS_FILE) > 256 * 1024:
+                with open(USERS_FILE, 'rb') as f:
+                    # use_float: ijson yields Decimal otherwise, which the
+                    # macro math and orjson serialization both choke on
+                    for u in ijson.items(f, 'item', use_float=True):
+                        if u.get('username') == username:
+                            if has_request_context():
+                                g._cached_user = u
+                            return u
+                return None
+        except OSError:
+            return None
+
     users = load_json(USERS_FILE)
     if not isinstance(users, list):
         return None
-    return next((u for u in users if u['username'] == username), None)
+    idx = load_index(USERS_FILE, 'username', lower=False).get(username)
+    user = users[idx] if idx is not None and idx < len(users) else None
+
+    if user is not None and has_request_context():
+        g._cached_user = user
+    return user
+
+_PUBLIC_NAMES_CACHE = {}
+
+def load_public_names(path):
+    """Lowercased names of all public items in a file, cached per mtime.
+
+    Backs the duplicate-name checks on submission: one set membership
+    test instead of stripping and lowercasing every record per call.
+    """
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    with _WRITE_LOCK:
+        dirty = path in _PENDING_WRITES
+
+    cached = None if dirty else _PUBLIC_NAMES_CACHE.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    names = {item.get('name', '').strip().lower()
+             for item in load_json_ro(path) if item.get('public', True)}
+    if not dirty:
+        _PUBLIC_NAMES_CACHE[path] = (stamp, names)
+    return names
+
+def get_workout_by_name(name):
+    """Workout record by name (case-insensitive) via the cached index"""
+    if not name:
+        return None
+    workouts = load_json_ro(WORKOUTS_FILE)
+    idx = load_index(WORKOUTS_FILE, 'name').get(name.strip().lower())
+    return workouts[idx] if idx is not None and idx < len(workouts) else None
+
+def username_taken(username):
+    """Case-insensitive check whether a username is already registered"""
+    if not username:
+        return False
+    return username.lower() in load_index(USERS_FILE, 'username')
 
 def update_user(user):
     """Update user in database"""
     users = load_json(USERS_FILE)
     if not isinstance(users, list):
         return
-    for i, u in enumerate(users):
-        if u['username'] == user['username']:
-            users[i] = user
-            break
+    idx = load_index(USERS_FILE, 'username', lower=False).get(user['username'])
+    if idx is not None and idx < len(users):
+        users[idx] = user
     save_json(USERS_FILE, users)
+    # Drop the per-request memo so later lookups see the saved state
+    if has_request_context():
+        g._cached_user = None
+
+# Profile fields the templates expect as plain ints
+_PROFILE_INT_KEYS = ('height', 'weight', 'calorie_goal', 'protein_goal', 'carb_goal', 'fat_goal')
+
+def coerce_profile_ints(user):
+    """Normalize legacy string values in a user's profile to ints"""
+    profile = user.get('profile') if user else None
+    if profile:
+        for key in _PROFILE_INT_KEYS:
+            if key in profile:
+                try:
+                    profile[key] = int(float(profile[key]))
+                except (ValueError, TypeError):
+                    profile[key] = 0
+    return user
 
 def is_admin():
     """Check if current user is admin"""
@@ -119,45 +740,73 @@ def safe_float(val):
     except (TypeError, ValueError):
         return 0.0
 
+# Below this many foods the plain loop beats NumPy's array-setup cost
+_VECTOR_MIN_FOODS = 8
+
 def calc_macros(entry):
     """Calculate macros based on entry"""
-    totals = {'protein': 0, 'carbs': 0, 'fat': 0, 'calories': 0}
-    
-    for food in entry.get('foods', []):
-        amount = food.get('amount', 100) or 100
-        factor = amount / 100
-        
-        totals['protein'] += (food.get('protein', 0) or 0) * factor
-        totals['carbs'] += (food.get('carbs', 0) or 0) * factor
-        totals['fat'] += (food.get('fat', 0) or 0) * factor
-        totals['calories'] += (food.get('calories', 0) or 0) * factor
-    
+    foods = entry.get('foods', [])
+
+    if len(foods) >= _VECTOR_MIN_FOODS:
+        # One matrix-vector product over an (N, 4) nutrient array instead
+        # of four dict-gets and multiplies per food in the interpreter
+        nutrients = np.fromiter(
+            (v for f in foods for v in (f.get('protein', 0) or 0,
+                                        f.get('carbs', 0) or 0,
+                                        f.get('fat', 0) or 0,
+                                        f.get('calories', 0) or 0)),
+            dtype=np.float64, count=4 * len(foods)
+        ).reshape(-1, 4)
+        factors = np.fromiter(
+            ((f.get('amount', 100) or 100) / 100 for f in foods),
+            dtype=np.float64, count=len(foods)
+        )
+        protein, carbs, fat, calories = factors @ nutrients
+    else:
+        protein = carbs = fat = calories = 0
+        for food in foods:
+            factor = (food.get('amount', 100) or 100) / 100
+            protein += (food.get('protein', 0) or 0) * factor
+            carbs += (food.get('carbs', 0) or 0) * factor
+            fat += (food.get('fat', 0) or 0) * factor
+            calories += (food.get('calories', 0) or 0) * factor
+
     entry.update({
-        'total_protein': round(totals['protein'], 1),
-        'total_carbs': round(totals['carbs'], 1),
-        'total_fat': round(totals['fat'], 1),
-        'total_cal': round(totals['calories'], 0)
+        'total_protein': round(float(protein), 1),
+        'total_carbs': round(float(carbs), 1),
+        'total_fat': round(float(fat), 1),
+        'total_cal': round(float(calories), 0)
     })
     return entry
 
+# (goal, gender) -> (calorie modifier, protein g/kg, Mifflin-St Jeor
+# constant), built once so the formula below is a single dict probe plus
+# float arithmetic
+_GOAL_TABLE = {
+    (goal, gender): (gm, ppk, 5 if gender == 'male' else -161)
+    for goal, gm, ppk in (('lose', 0.8, 2.0), ('maintain', 1.0, 1.8), ('gain', 1.15, 2.0))
+    for gender in ('male', 'female')
+}
+
 def calculate_recommended_macros(weight=70, height=175, age=25, gender='male', goal='maintain', activity_level=1.5):
     """Calculate recommended macros based on user profile"""
+    gender = gender.lower()
+    goal_modifier, protein_per_kg, s = _GOAL_TABLE.get(
+        (goal.lower(), gender), (1.0, 1.8, 5 if gender == 'male' else -161))
+
     # BMR calculation (Mifflin-St Jeor Equation)
-    s = 5 if gender.lower() == 'male' else -161
     bmr = 10 * weight + 6.25 * height - 5 * age + s
-    
+
     # TDEE calculation
     tdee = bmr * activity_level
-    
-    # Goal modifiers
-    goal_modifiers = {'lose': 0.8, 'maintain': 1.0, 'gain': 1.15}
-    target_calories = tdee * goal_modifiers.get(goal.lower(), 1.0)
-    
+
+    # Goal modifier
+    target_calories = tdee * goal_modifier
+
     # Protein calculation
-    protein_per_kg = {'lose': 2.0, 'maintain': 1.8, 'gain': 2.0}
-    protein_grams = weight * protein_per_kg.get(goal.lower(), 1.8)
+    protein_grams = weight * protein_per_kg
     protein_calories = protein_grams * 4
-    
+
     # Fat calculation
     fat_grams = weight * 0.9
     fat_calories = fat_grams * 9
@@ -192,6 +841,9 @@ def find_duplicate(items, name):
 
 # NEW SECURITY FUNCTIONS
 
+# Compiled once; validate_name runs on every signup and item submission
+_NAME_RE = re.compile(r"^[a-zA-Z0-9\s\-']+$")
+
 def validate_name(name, item_type="item"):
     """Comprehensive name validation"""
     if not name or not isinstance(name, str):
@@ -205,7 +857,7 @@ def validate_name(name, item_type="item"):
         return False, f"{item_type} name must be less than 100 characters"
     
     # Character validation
-    if not re.match(r"^[a-zA-Z0-9\s\-']+$", name):
+    if not _NAME_RE.match(name):
         return False, f"{item_type} name can only contain letters, numbers, spaces, hyphens, and apostrophes"
     
     # Prevent only whitespace
@@ -220,21 +872,67 @@ def validate_name(name, item_type="item"):
 
 def validate_numeric_input(value, field_name, min_val=0, max_val=10000):
     """Validate numeric inputs for sets, reps, weight, etc."""
-    try:
-        if value == '' or value is None:
-            return True, 0
-        num_val = float(value)
-        if num_val < min_val or num_val > max_val:
-            return False, f"{field_name} must be between {min_val} and {max_val}"
-        return True, num_val
-    except (ValueError, TypeError):
-        return False, f"{field_name} must be a valid number"
+    if value == '' or value is None:
+        return True, 0
+    # Skip the conversion when the caller already holds a float; the
+    # error strings are only built on the failure paths
+    if type(value) is not float:
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            return False, f"{field_name} must be a valid number"
+    if min_val <= value <= max_val:
+        return True, value
+    return False, f"{field_name} must be between {min_val} and {max_val}"
+
+# Sliding-window rate limiter state: one deque of timestamps per
+# (identifier, action) pair, trimmed on each check. Redis would be the
+# canonical backend for a multi-process deployment; this app runs as a
+# single process, so an in-memory deque behind a lock gives the same
+# one-lookup cost without a network hop or the old rate_limits.json file.
+_RATE_LOCK = threading.Lock()
+_RATE_BUCKETS = {}
 
 def check_rate_limit(user, action_type, max_actions=10, time_window=3600):
-    """Prevent spam by limiting actions per hour - TEMPORARILY DISABLED"""
-    # Temporarily return True to bypass rate limiting
+    """Prevent spam by limiting actions per time window"""
+    now = time.monotonic()
+    key = (user, action_type)
+    with _RATE_LOCK:
+        bucket = _RATE_BUCKETS.get(key)
+        if bucket is None:
+            bucket = _RATE_BUCKETS[key] = deque()
+        cutoff = now - time_window
+        while bucket and bucket[0] <= cutoff:
+            bucket.popleft()
+        if len(bucket) >= max_actions:
+            retry_in = int(bucket[0] + time_window - now) + 1
+            return False, f"Rate limit exceeded. Please try again in {retry_in} seconds."
+        bucket.append(now)
     return True, ""
 
+def login_required(f):
+    """Reject unauthenticated API requests with a 401 JSON body"""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if 'user' not in session:
+            return ojsonify({'error': 'Not authenticated'}, status=401)
+        return f(*args, **kwargs)
+    return wrapper
+
+def rate_limited(action_type, max_actions, time_window):
+    """Gate a handler on check_rate_limit keyed by the session user"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            rate_ok, rate_msg = check_rate_limit(session['user'], action_type,
+                                                 max_actions=max_actions,
+                                                 time_window=time_window)
+            if not rate_ok:
+                return ojsonify({'error': rate_msg}, status=429)
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
 def sanitize_entry_data(entry):
     """Clean entry data before saving"""
     sanitized = {